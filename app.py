@@ -1,10 +1,17 @@
 import os
 import sys
-import configparser
+from functools import cached_property
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 from requests import RequestException, HTTPError
-from client import SpotifyClient
-from auth import get_auth_from_config
+from client import SpotifyClient, PlaylistTooLargeError
+from auth import build_auth
+
+# Allowed data_order values and the (track, artist) field indexes for each
+data_orders: Dict[str, Tuple[int, int]] = {
+    "track artist": (0, 1),
+    "artist track": (1, 0)
+}
 
 
 class PlaylistFile:
@@ -16,22 +23,24 @@ class PlaylistFile:
         self.lines = self.clean_lines()
 
     def clean_lines(self) -> List[str]:
-        # Return the lines of this object's file stripped of whitespace.
-        with open(self.path, "r") as f:
-            lines = f.readlines()
-        return [ln.strip() for ln in lines]
-
-    def line_starts_with(self, prefix: str) -> Union[str, None]:
-        # Return the first line beginning with prefix, or None.
+        # Return the non-empty lines of this object's file stripped of whitespace.
+        text = Path(self.path).read_text(encoding="utf-8")
+        return [ln.strip() for ln in text.splitlines() if ln.strip()]
+
+    def line_starts_with(self, prefixes: Tuple[str, ...]) -> Union[str, None]:
+        # Return the first line beginning with any of prefixes, or None.
+        # Only the longest prefix's slice needs lowercasing, not the whole line
+        width = max(len(prefix) for prefix in prefixes)
         for ln in self.lines:
-            if ln.lower().startswith(prefix):
+            if ln[:width].lower().startswith(prefixes):
                 return ln
         return None
 
+    @cached_property
     def playlist_name(self) -> str:
         """Return this playlist's name on a specific line or the filename."""
         # Assumption: Line with playlist name begins with "name:"
-        line = self.line_starts_with("name:")
+        line = self.line_starts_with(("name:",))
         if not line:
             return self.filename
         colon_index = line.index(":")
@@ -45,38 +54,26 @@ class PlaylistFile:
         # Assumption: Track name and artists separated by delimiter
         # Assumption: order argument is "track artist" or "artist track"
         items = []
-        track_index = order.split().index("track")
-        artist_index = order.split().index("artist")
+        track_index, artist_index = data_orders[order]
         for ln in self.lines:
-            content = ln.split(delimiter)
-            if len(content) < 2:
+            head, sep, tail = ln.partition(delimiter)
+            if not sep:
                 continue
-            track = content[track_index].strip()
-            artist = content[artist_index].strip()
-            items.append((track, artist))
+            fields = (head.strip(), tail.strip())
+            items.append((fields[track_index], fields[artist_index]))
         return items
 
 
-def directory_files(path: str) -> List[str]:
-    # Return the names of all files in a directory path
-    filenames = []
-    contents = os.listdir(path)
-    for entry in contents:
-        entry_path = os.path.join(path, entry)
-        if os.path.isfile(entry_path):
-            filenames.append(entry)
-    return filenames
-
-def filter_textfiles(filenames: List[str]) -> List[str]:
-    # Return the names of all files with a .txt extension
-    txtfile = lambda name: os.path.splitext(name)[1] == ".txt"
-    return [fn for fn in filenames if txtfile(fn)]
-
 def directory_textfiles(path: str) -> List[str]:
     # Return the names of all text files in a directory path
     if not os.path.isdir(path):
         raise NotADirectoryError('"{}" is not a directory.'.format(path))
-    textfiles = filter_textfiles(directory_files(path))
+    # DirEntry.is_file() reuses the type from the directory listing
+    with os.scandir(path) as entries:
+        textfiles = [
+            entry.name for entry in entries
+            if entry.is_file() and entry.name.endswith(".txt")
+        ]
     if not textfiles:
         message = '"{}" contains no textfiles'.format(path)
         raise FileNotFoundError(message)
@@ -92,8 +89,12 @@ def get_playlists(directory_path: str) -> List[PlaylistFile]:
         playlists.append(PlaylistFile(tf_path, tf_name))
     return playlists
 
-parser = configparser.ConfigParser
 config_error_msg = "Something went wrong reading your config file...\n"
+# Sections and keys read from config.ini, in the order they are reported
+config_keys = {
+    "FILE_INFO": ["directory_path", "data_order", "data_delimiter"],
+    "API": ["user_id", "client_id", "client_secret", "refresh_token"]
+}
 
 def show_error(message: str) -> None:
     sys.stderr.write("Error: {}\n".format(message))
@@ -111,27 +112,44 @@ def get_config_path() -> Optional[str]:
         show_error("Required configuration file 'config.ini' not found")
     return path
 
-def read_config(config_path: str) -> parser:
-    config = configparser.ConfigParser()
+def read_config(config_path: str) -> Dict[str, Dict[str, str]]:
+    # Parse "[SECTION]" headers and "key = value" lines into nested dicts.
+    # The schema is small and fixed, so configparser isn't worth importing.
+    config = {}
+    section = None
     with open(config_path, "r") as config_file:
-        config.read_file(config_file)
+        for line_number, ln in enumerate(config_file, 1):
+            ln = ln.strip()
+            if not ln or ln.startswith(("#", ";")):
+                continue
+            if ln.startswith("[") and ln.endswith("]"):
+                section = config.setdefault(ln[1:-1].strip(), {})
+                continue
+            # Like configparser, split on whichever of "=" or ":" comes first
+            split_at = min(
+                (i for i in (ln.find("="), ln.find(":")) if i != -1),
+                default=-1
+            )
+            if section is None or split_at == -1:
+                custom_msg = ("Line {} is not a [SECTION] header or a "
+                              "'key = value' / 'key: value' line: {!r}")
+                show_error(config_error_msg + custom_msg.format(line_number, ln))
+            key, value = ln[:split_at], ln[split_at + 1:]
+            section[key.strip().lower()] = value.strip()
     return config
 
-def get_config_values(config: parser) -> Optional[Dict[str, str]]:
-    try:
-        values = {
-            "directory_path": config.get("FILE_INFO", "directory_path"),
-            "data_order":     config.get("FILE_INFO", "data_order"),
-            "data_delimiter": config.get("FILE_INFO", "data_delimiter"),
-            "user_id":        config.get("API", "user_id"),
-            "client_id":      config.get("API", "client_id"),
-            "client_secret":  config.get("API", "client_secret"),
-            "refresh_token":  config.get("API", "refresh_token")
-        }
-    except configparser.Error as error:
-        show_error(config_error_msg + str(error))
-    else:
-        return values
+def get_config_values(
+        config: Dict[str, Dict[str, str]]) -> Optional[Dict[str, str]]:
+    values = {}
+    for section, keys in config_keys.items():
+        if section not in config:
+            show_error(config_error_msg + "No section: '{}'".format(section))
+        for key in keys:
+            if key not in config[section]:
+                custom_msg = "No option '{}' in section: '{}'".format(key, section)
+                show_error(config_error_msg + custom_msg)
+            values[key] = config[section][key]
+    return values
 
 def check_empty(mapping: Dict[str, str]) -> None:
     empty_keys = [key for key in mapping if not mapping[key]]
@@ -141,9 +159,8 @@ def check_empty(mapping: Dict[str, str]) -> None:
         show_error(config_error_msg + custom_msg)
 
 def check_data_order(data_order: str) -> None:
-    allowed = ["track artist", "artist track"]
-    if data_order not in allowed:
-        quoted = quote_each_word(allowed)
+    if data_order not in data_orders:
+        quoted = quote_each_word(list(data_orders))
         custom_msg = "Key 'data_order' must equal one of {}".format(quoted)
         show_error(config_error_msg + custom_msg)
 
@@ -163,7 +180,7 @@ def convert_files(
         order: str
         ) -> None:
     for file in playlist_files:
-        name = file.playlist_name()
+        name = file.playlist_name
         items = file.playlist_items(delimiter, order)
         try:
             client.make_playlist_with_tracks(name, items)
@@ -172,16 +189,17 @@ def convert_files(
         except RequestException as error:
             custom_msg = "A request exception occurred...\n"
             show_error(custom_msg + str(error))
+        except PlaylistTooLargeError as error:
+            show_error(str(error))
 
 def run_app():
-    config_path = get_config_path()
-    config = get_config_values(read_config(config_path))
+    config = get_config_values(read_config(get_config_path()))
     check_empty(config)
     check_data_order(config["data_order"])
     files = get_playlist_files(config["directory_path"])
     
     # Initialize auth and client
-    auth = get_auth_from_config(config_path)
+    auth = build_auth(config)
     sp_client = SpotifyClient(auth, config["user_id"])
     
     delimiter, data_order = config["data_delimiter"], config["data_order"]
@@ -1,23 +1,98 @@
 import base64
 import json
 import os
+import threading
 from typing import Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
+# How long a failed token refresh is reported again before retrying it
+REFRESH_COOLDOWN = timedelta(seconds=60)
+
+class TokenRefreshError(requests.exceptions.RequestException):
+    """Raised while a recent token refresh failure is still cooling down."""
+
+class RateLimitRetry(Retry):
+    """Retry policy that also retries POSTs, but only when rate limited."""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        # A 429 means Spotify did not act on the request, so resending a
+        # POST can't create duplicates; other statuses keep urllib3's
+        # idempotent-methods-only rule
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+def create_session() -> requests.Session:
+    """Create a pooled session that backs off on rate limits and 5xx errors."""
+    retry = RateLimitRetry(
+        total=3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        backoff_factor=0.5,
+        respect_retry_after_header=True,
+        # Hand the last response back so raise_for_status reports it
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+def basic_auth_header(client_id: str, client_secret: str) -> str:
+    """Build the Basic header value Spotify's token endpoint expects."""
+    auth_string = f"{client_id}:{client_secret}"
+    auth_base64 = base64.b64encode(auth_string.encode('utf-8')).decode('utf-8')
+    return f"Basic {auth_base64}"
+
 class SpotifyAuth:
     def __init__(self, client_id: str, client_secret: str, refresh_token: str):
         self.client_id = client_id
         self.client_secret = client_secret
         self.refresh_token = refresh_token
+        # Client credentials never change, so encode them only once
+        self._basic_auth_header = basic_auth_header(client_id, client_secret)
         self.access_token = None
         self.token_expiry = None
+        self._cached_header = None
+        self._session = create_session()
+        self._refresh_failure: Optional[Exception] = None
+        self._retry_refresh_at: Optional[datetime] = None
+        # Searches run on several threads; only one of them should refresh
+        self._lock = threading.Lock()
 
     def get_access_token(self) -> str:
         """Get a valid access token, refreshing if necessary."""
-        if self._is_token_expired():
+        with self._lock:
+            self._ensure_fresh_token()
+            return self.access_token
+
+    def authorization_header(self) -> str:
+        """Get the bearer header value for the current access token."""
+        with self._lock:
+            self._ensure_fresh_token()
+            return self._cached_header
+
+    def _ensure_fresh_token(self) -> None:
+        """Refresh an expiring token, failing fast after a recent failed refresh."""
+        if not self._is_token_expired():
+            return
+        # Don't hammer the token endpoint with one refresh per pending request
+        if self._refresh_failure and datetime.now() < self._retry_refresh_at:
+            # A fresh exception per caller, so threads don't share and grow
+            # one traceback
+            retry_at = self._retry_refresh_at.strftime("%H:%M:%S")
+            raise TokenRefreshError(
+                f"Token refresh failed recently; retrying after {retry_at}"
+            ) from self._refresh_failure
+        try:
             self._refresh_token()
-        return self.access_token
+        except requests.exceptions.RequestException as error:
+            self._refresh_failure = error
+            self._retry_refresh_at = datetime.now() + REFRESH_COOLDOWN
+            raise
+        self._refresh_failure = None
 
     def _is_token_expired(self) -> bool:
         """Check if the current access token is expired or about to expire."""
@@ -28,12 +103,8 @@ class SpotifyAuth:
 
     def _refresh_token(self) -> None:
         """Refresh the access token using the refresh token."""
-        auth_string = f"{self.client_id}:{self.client_secret}"
-        auth_bytes = auth_string.encode('utf-8')
-        auth_base64 = base64.b64encode(auth_bytes).decode('utf-8')
-
         headers = {
-            'Authorization': f'Basic {auth_base64}',
+            'Authorization': self._basic_auth_header,
             'Content-Type': 'application/x-www-form-urlencoded'
         }
 
@@ -42,22 +113,19 @@ class SpotifyAuth:
             'refresh_token': self.refresh_token
         }
 
-        response = requests.post('https://accounts.spotify.com/api/token', headers=headers, data=data)
+        response = self._session.post('https://accounts.spotify.com/api/token', headers=headers, data=data)
         response.raise_for_status()
         
         token_data = response.json()
         self.access_token = token_data['access_token']
+        self._cached_header = f"Bearer {self.access_token}"
         # Set token expiry to 1 hour from now
         self.token_expiry = datetime.now() + timedelta(seconds=token_data.get('expires_in', 3600))
 
-def get_auth_from_config(config_path: str) -> SpotifyAuth:
-    """Create SpotifyAuth instance from config file."""
-    import configparser
-    config = configparser.ConfigParser()
-    config.read(config_path)
-    
+def build_auth(config: Dict[str, str]) -> SpotifyAuth:
+    """Create SpotifyAuth instance from the app's config values."""
     return SpotifyAuth(
-        client_id=config.get('API', 'client_id'),
-        client_secret=config.get('API', 'client_secret'),
-        refresh_token=config.get('API', 'refresh_token')
+        client_id=config['client_id'],
+        client_secret=config['client_secret'],
+        refresh_token=config['refresh_token']
     ) 
\ No newline at end of file
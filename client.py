@@ -1,74 +1,125 @@
-from json import dumps
-from typing import List, Tuple, Dict, Union, Any
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Dict, Union, Any, Iterable, Iterator
 import requests
-from auth import SpotifyAuth
+from auth import SpotifyAuth, create_session
 
 SEARCH_URL = "https://api.spotify.com/v1/search"
 CONTAINS_URL = "https://api.spotify.com/v1/me/tracks/contains"
 PLAYLIST_URL = "https://api.spotify.com/v1/users/{}/playlists"
 ADD_TRACK_URL = "https://api.spotify.com/v1/playlists/{}/tracks"
 
+# Search candidates considered per track; only a saved one or the top
+# result is ever used
+SEARCH_LIMIT = 5
+# Maximum number of IDs accepted by the contains endpoint
+CONTAINS_LIMIT = 50
+# Spotify refuses to grow a playlist past this many tracks
+MAX_PLAYLIST_TRACKS = 10000
+# Number of searches allowed in flight at once
+SEARCH_WORKERS = 8
+
+class PlaylistTooLargeError(ValueError):
+    """Raised when a playlist has more tracks than Spotify allows."""
+
 class SpotifyClient:
     
     def __init__(self, auth: SpotifyAuth, user_id: str):
         self.auth = auth
         self.user_id = user_id
+        # Reuse connections across requests instead of reconnecting each time
+        self._session = create_session()
+        # Lookups already made this run, shared by every playlist
+        self._search_cache: Dict[Tuple[str, str], List[str]] = {}
+        self._saved_cache: Dict[str, bool] = {}
 
     def find_track_ids(self, track:str, artist:str) -> List[str]:
         query = "{} artist:{}".format(track, artist)
         request_args = {
             "url" : SEARCH_URL,
-            "headers" : {"Authorization": "Bearer " + self.auth.get_access_token()},
-            "params": {"q": query, "type": "track", "limit": 20}
+            "headers" : {"Authorization": self.auth.authorization_header()},
+            "params": {"q": query, "type": "track", "limit": SEARCH_LIMIT}
         }
         response_json = self.send_request("GET", request_args)
         tracks_found = response_json["tracks"]["items"]
         return [result["id"] for result in tracks_found]
 
-    def find_saved_track(self, track_ids: List[str]) -> Union[str, None]:
+    def find_saved_track(self, track_ids: List[str]) -> Dict[str, bool]:
         request_args = {
             "url": CONTAINS_URL,
-            "headers" : {"Authorization": "Bearer " + self.auth.get_access_token()},
-            "params": {"ids": track_ids}
+            "headers" : {"Authorization": self.auth.authorization_header()},
+            # Spotify expects a single comma-separated list of IDs
+            "params": {"ids": ",".join(track_ids)}
         }
         response_json = self.send_request("GET", request_args)
-        return self.first_saved(list(zip(track_ids, response_json)))
+        return dict(zip(track_ids, response_json))
 
-    def get_track_id(self, track: str, artist: str) -> Union[str, None]:
-        track_results = self.find_track_ids(track, artist)
-        if not track_results:
-            return None
-        saved_track = self.find_saved_track(track_results)
-        if not saved_track:
-            return track_results[0]
-        return saved_track
+    def get_track_ids(
+            self,
+            tracks_with_artist: List[Tuple[str, str]]
+        ) -> List[Union[str, None]]:
+        # Search each track, then check every candidate against the user's
+        # saved tracks in as few contains requests as possible
+        keys = [
+            self.search_key(track, artist) for track, artist in tracks_with_artist
+        ]
+        # Search each distinct track only once, skipping earlier results
+        to_search = {}
+        for key, track_with_artist in zip(keys, tracks_with_artist):
+            if key not in self._search_cache:
+                to_search.setdefault(key, track_with_artist)
+        with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+            futures = {
+                executor.submit(self.find_track_ids, track, artist): key
+                for key, (track, artist) in to_search.items()
+            }
+            try:
+                for future in as_completed(futures):
+                    self._search_cache[futures[future]] = future.result()
+            except BaseException:
+                # The lookup failed or was interrupted (e.g. Ctrl-C) while
+                # waiting, so skip searches that have not started
+                for pending in futures:
+                    pending.cancel()
+                raise
+        candidates = [self._search_cache[key] for key in keys]
+        unknown_ids = list(dict.fromkeys(
+            tid for track_results in candidates for tid in track_results
+            if tid not in self._saved_cache
+        ))
+        for chunk in self.subsets_of_size(unknown_ids, CONTAINS_LIMIT):
+            self._saved_cache.update(self.find_saved_track(chunk))
+
+        track_ids = []
+        for track_results in candidates:
+            if not track_results:
+                track_ids.append(None)
+                continue
+            tracks_saved = [
+                (tid, self._saved_cache.get(tid, False)) for tid in track_results
+            ]
+            track_ids.append(self.first_saved(tracks_saved) or track_results[0])
+        return track_ids
 
     def create_playlist(self, name: str) -> str:
         request_args = {
             "url": PLAYLIST_URL.format(self.user_id),
-            "headers": {
-                "Authorization": "Bearer " + self.auth.get_access_token(),
-                "Content-Type": "application/json"
-            },
-            "data": dumps({"name": name})
+            "headers": {"Authorization": self.auth.authorization_header()},
+            "json": {"name": name}
         }
         response_json = self.send_request("POST", request_args)
         # Playlist ID used to add tracks to the playlist
         return response_json["id"]
 
     def add_playlist_tracks(self, pid: str, track_uris: List[str]) -> None:
+        self.check_track_limit(track_uris)
         request_args = {
             "url": ADD_TRACK_URL.format(pid),
-            "headers": {
-                "Authorization": "Bearer " + self.auth.get_access_token(),
-                "Content-Type": "application/json"
-            }
+            "headers": {"Authorization": self.auth.authorization_header()}
         }
         # Maximum of 100 items per request
-        subsets = self.subsets_of_size(track_uris, 100)
-        for subset in subsets:
-            request_body = {"uris": subset}
-            request_args["data"] = dumps(request_body)
+        for subset in self.subsets_of_size(track_uris, 100):
+            request_args["json"] = {"uris": subset}
             self.send_request("POST", request_args)
 
     def make_playlist_with_tracks(
@@ -76,27 +127,29 @@ class SpotifyClient:
             playlist_name: str,
             tracks_with_artist: List[Tuple[str, str]]
         ) -> None:
-        # Get track IDs and filter out None values
-        track_ids = []
-        for track, artist in tracks_with_artist:
-            track_id = self.get_track_id(track, artist)
+        # Build track URIs, skipping tracks that could not be found
+        track_uris = []
+        found_ids = self.get_track_ids(tracks_with_artist)
+        for (track, artist), track_id in zip(tracks_with_artist, found_ids):
             if track_id:
-                track_ids.append(track_id)
+                track_uris.append(f"spotify:track:{track_id}")
             else:
                 print(f"Could not find track: {track} by {artist}")
         
-        if not track_ids:
+        if not track_uris:
             print("No valid tracks found to add to playlist")
             return
             
-        track_uris = ["spotify:track:{}".format(tid) for tid in track_ids]
-        if track_uris:
-            playlist_id = self.create_playlist(playlist_name)
-            self.add_playlist_tracks(playlist_id, track_uris)
+        # Drop repeated tracks while keeping their first position
+        track_uris = list(dict.fromkeys(track_uris))
+        # Fail before creating a playlist that could never be filled
+        self.check_track_limit(track_uris)
+        playlist_id = self.create_playlist(playlist_name)
+        self.add_playlist_tracks(playlist_id, track_uris)
 
     def send_request(self, method: str, request_args: Dict) -> Any:
         try:
-            response = requests.request(method, **request_args)
+            response = self._session.request(method, **request_args)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
@@ -114,11 +167,17 @@ class SpotifyClient:
                 return tid
         return None
 
-    def subsets_of_size(self, items: List, size: int) -> List[List]:
-        subsets = []
-        duplicate = list(items)
-        while duplicate:
-            subset = duplicate[:size]
-            subsets.append(subset)
-            duplicate = duplicate[size:]
-        return subsets
+    def search_key(self, track: str, artist: str) -> Tuple[str, str]:
+        return track.strip().lower(), artist.strip().lower()
+
+    def check_track_limit(self, track_uris: List[str]) -> None:
+        if len(track_uris) > MAX_PLAYLIST_TRACKS:
+            raise PlaylistTooLargeError(
+                f"Playlists are limited to {MAX_PLAYLIST_TRACKS} tracks, "
+                f"got {len(track_uris)}"
+            )
+
+    def subsets_of_size(self, items: Iterable, size: int) -> Iterator[List]:
+        it = iter(items)
+        while chunk := list(itertools.islice(it, size)):
+            yield chunk
@@ -1,11 +1,12 @@
-import base64
 import configparser
 import json
 import os
+import sys
 import webbrowser
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 import requests
+from auth import basic_auth_header
 
 # Spotify API endpoints
 AUTH_URL = 'https://accounts.spotify.com/authorize'
@@ -56,12 +57,8 @@ def get_refresh_token(client_id: str, client_secret: str) -> str:
         raise Exception("Failed to get authorization code")
     
     # Exchange the authorization code for a refresh token
-    auth_string = f"{client_id}:{client_secret}"
-    auth_bytes = auth_string.encode('utf-8')
-    auth_base64 = base64.b64encode(auth_bytes).decode('utf-8')
-    
     headers = {
-        'Authorization': f'Basic {auth_base64}',
+        'Authorization': basic_auth_header(client_id, client_secret),
         'Content-Type': 'application/x-www-form-urlencoded'
     }
     
@@ -113,12 +110,8 @@ def main():
         refresh_token = get_refresh_token(client_id, client_secret)
         
         # Get initial access token to fetch user ID
-        auth_string = f"{client_id}:{client_secret}"
-        auth_bytes = auth_string.encode('utf-8')
-        auth_base64 = base64.b64encode(auth_bytes).decode('utf-8')
-        
         headers = {
-            'Authorization': f'Basic {auth_base64}',
+            'Authorization': basic_auth_header(client_id, client_secret),
             'Content-Type': 'application/x-www-form-urlencoded'
         }
         